@@ -191,6 +191,18 @@ class Emulator:
 
         return emu
 
+    def _split_observables(self, Y):
+        """
+        Split an array of all observables into a nested dict of arrays.
+
+        """
+        return {
+            obs: {
+                subobs: Y[..., s]
+                for subobs, s in slices.items()
+            } for obs, slices in self._slices.items()
+        }
+
     def _inverse_transform(self, Z):
         """
         Inverse transform principal components to observables.
@@ -203,14 +215,9 @@ class Emulator:
         Y = np.dot(Z, self._trans_matrix[:Z.shape[-1]])
         Y += self.scaler.mean_
 
-        return {
-            obs: {
-                subobs: Y[..., s]
-                for subobs, s in slices.items()
-            } for obs, slices in self._slices.items()
-        }
+        return self._split_observables(Y)
 
-    def predict(self, X, return_cov=False, extra_std=0):
+    def predict(self, X, return_cov=False, return_std=False, extra_std=0):
         """
         Predict model output at `X`.
 
@@ -243,15 +250,30 @@ class Emulator:
         NB: the covariance is only computed between observables and centrality
         bins, not between sample points.
 
+        If `return_std` is true, return a tuple ``(mean, std)``, where std is
+        the predictive standard deviation of each observable as a nested dict
+        with the same shapes as the mean.  This is equivalent to the square
+        root of the covariance diagonal but much cheaper, since the full
+        covariance is never built.  `return_cov` and `return_std` may not both
+        be true.
+
         `extra_std` is additional uncertainty which is added to each GP's
         predictive uncertainty, e.g. to account for model systematic error.  It
         may either be a scalar or an array-like of length nsamples.
 
         """
-        gp_mean = [gp.predict(X, return_cov=return_cov) for gp in self.gps]
+        if return_cov and return_std:
+            raise ValueError('return_cov and return_std may not both be true')
+
+        gp_mean = [
+            gp.predict(X, return_cov=return_cov, return_std=return_std)
+            for gp in self.gps
+        ]
 
         if return_cov:
             gp_mean, gp_cov = zip(*gp_mean)
+        elif return_std:
+            gp_mean, gp_std = zip(*gp_mean)
 
         mean = self._inverse_transform(
             np.concatenate([m[:, np.newaxis] for m in gp_mean], axis=1)
@@ -265,7 +287,7 @@ class Emulator:
             ], axis=1)
 
             # Add extra uncertainty to predictive variance.
-            extra_std = np.array(extra_std, copy=False).reshape(-1, 1)
+            extra_std = np.asarray(extra_std).reshape(-1, 1)
             gp_var += extra_std**2
 
             # Compute the covariance at each sample point using the
@@ -276,6 +298,23 @@ class Emulator:
             cov += self._cov_trunc
 
             return mean, _Covariance(cov, self._slices)
+        elif return_std:
+            # Build array of the GP predictive variances, same as above.
+            gp_var = np.concatenate([
+                s[:, np.newaxis]**2 for s in gp_std
+            ], axis=1)
+
+            extra_std = np.asarray(extra_std).reshape(-1, 1)
+            gp_var += extra_std**2
+
+            # Only the diagonal of the covariance transformation is needed:
+            #
+            #   var_i = sum_k A_ki^2 var_k
+            #
+            var = np.dot(gp_var, self._trans_matrix[:self.npc]**2)
+            var += self._cov_trunc.diagonal()
+
+            return mean, self._split_observables(np.sqrt(var))
         else:
             return mean
 
@@ -482,18 +482,28 @@ def credible_interval(samples, ci=.9):
     Compute the highest-posterior density (HPD) credible interval (default 90%)
     for an array of samples.
 
+    If `samples` is a 2D array, compute the interval for each row and return
+    arrays of the lows and highs.
+
     """
+    samples = np.asarray(samples)
+    nsamples = samples.shape[-1]
+
     # number of intervals to compute
-    nci = int((1 - ci)*samples.size)
+    nci = int((1 - ci)*nsamples)
 
     # find highest posterior density (HPD) credible interval
     # i.e. the one with minimum width
-    argp = np.argpartition(samples, [nci, samples.size - nci])
-    cil = np.sort(samples[argp[:nci]])   # interval lows
-    cih = np.sort(samples[argp[-nci:]])  # interval highs
-    ihpd = np.argmin(cih - cil)
+    samples = np.partition(samples, [nci, nsamples - nci], axis=-1)
+    cil = np.sort(samples[..., :nci], axis=-1)   # interval lows
+    cih = np.sort(samples[..., -nci:], axis=-1)  # interval highs
+    ihpd = np.argmin(cih - cil, axis=-1)
+
+    if samples.ndim == 1:
+        return cil[ihpd], cih[ihpd]
 
-    return cil[ihpd], cih[ihpd]
+    rows = np.arange(samples.shape[0])
+    return cil[rows, ihpd], cih[rows, ihpd]
 
 
 def main():
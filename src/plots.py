@@ -2,10 +2,11 @@
 Generates plots / figures when run as a script.
 Plot files are placed in the :file:`plots` directory.
 
-By default, simply running ``python -m src.plots`` generates **ALL** plots,
-which may not be desired.  Instead, one can pass a list of plots to generate:
-``python -m src.plots plot1 plot2 ...``.  The full list of plots is shown in
-the usage information ``python -m src.plots --help``.
+By default, simply running ``python -m src.plots`` generates **ALL** plots (in
+parallel, one process per CPU), which may not be desired.  Instead, one can
+pass a list of plots to generate: ``python -m src.plots plot1 plot2 ...``.
+The full list of plots is shown in the usage information ``python -m
+src.plots --help``.
 
 Typing can be reduced by using shell brace expansion, e.g. ``python -m
 src.plots observables_{design,posterior}`` for both ``observables_design`` and
@@ -17,37 +18,33 @@ In the code, each plot is generated by a function tagged with the ``@plot``
 decorator.
 """
 
+import copy
+import functools
 import itertools
 import logging
 from pathlib import Path
-import subprocess
-import tempfile
 import warnings
 
 from sklearn.externals import joblib
-import h5py
 import hsluv
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib import colors as mcolors
 from matplotlib import lines
 from matplotlib import patches
 from matplotlib import ticker
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.container import ErrorbarContainer
 from scipy import special
 from scipy.interpolate import PchipInterpolator
-from sklearn.decomposition import PCA
-from sklearn.gaussian_process import GaussianProcessRegressor as GPR
-from sklearn.gaussian_process import kernels
-from sklearn.mixture import GaussianMixture
-from functools import wraps
 
 from . import workdir, systems, parse_system, mcmc, data_list, exp_data_list#, data_list_val#, model, expt
 from .design import Design
-from .emulator import emulators
+from .emulator import Emulator, emulators
 
 
 default_system = systems[0]
 
-fontsmall, fontnormal, fontlarge = 5, 6, 7
 offblack = '#262626'
 aspect = 1/1.618
 resolution = 72.27
@@ -57,54 +54,7 @@ fullwidth = 350/resolution
 fullheight = 270/resolution
 
 plt.rcdefaults()
-plt.rcParams.update({
-#    'font.family': 'sans-serif',
-#    'font.sans-serif': ['Lato'],
-    'mathtext.fontset': 'custom',
-    'mathtext.default': 'it',
-#    'mathtext.rm': 'sans',
-#    'mathtext.it': 'sans:italic:medium',
-#    'mathtext.cal': 'sans',
-    'font.size': fontnormal,
-    'legend.fontsize': fontnormal,
-    'axes.labelsize': fontnormal,
-    'axes.titlesize': fontlarge,
-    'xtick.labelsize': fontsmall,
-    'ytick.labelsize': fontsmall,
-    'font.weight': 400,
-    'axes.labelweight': 400,
-    'axes.titleweight': 400,
-    'lines.linewidth': .5,
-    'lines.markersize': 3,
-    'lines.markeredgewidth': 0,
-    'patch.linewidth': .5,
-    'axes.linewidth': .4,
-    'xtick.major.width': .4,
-    'ytick.major.width': .4,
-    'xtick.minor.width': .4,
-    'ytick.minor.width': .4,
-    'xtick.major.size': 1.2,
-    'ytick.major.size': 1.2,
-    'xtick.minor.size': .8,
-    'ytick.minor.size': .8,
-    'xtick.major.pad': 1.5,
-    'ytick.major.pad': 1.5,
-    'axes.formatter.limits': (-5, 5),
-    'axes.spines.top': False,
-    'axes.spines.right': False,
-    'axes.labelpad': 3,
-    'text.color': offblack,
-    'axes.edgecolor': offblack,
-    'axes.labelcolor': offblack,
-    'xtick.color': offblack,
-    'ytick.color': offblack,
-    'legend.numpoints': 1,
-    'legend.scatterpoints': 1,
-    'legend.frameon': False,
-    'image.cmap': 'Blues',
-    'image.interpolation': 'none',
-    'pdf.fonttype': 42
-})
+plt.style.use(str(Path(__file__).parent / 'styles' / 'paper.mplstyle'))
 
 
 plotdir = workdir / 'plots'
@@ -119,15 +69,15 @@ def plot(f):
     and saves the figure as the function name.
 
     """
-    @wraps(f)
+    @functools.wraps(f)
     def wrapper(*args, **kwargs):
         logging.info('generating plot: %s', f.__name__)
         f(*args, **kwargs)
 
         fig = plt.gcf()
 
-        if not fig.get_tight_layout():
-            set_tight(fig)
+        if not (fig.get_constrained_layout() or fig.get_tight_layout()):
+            set_constrained(fig)
 
         plotfile = plotdir / '{}.pdf'.format(f.__name__)
         fig.savefig(str(plotfile))
@@ -151,6 +101,20 @@ def set_tight(fig=None, **kwargs):
     fig.set_tight_layout(kwargs)
 
 
+def set_constrained(fig=None, **kwargs):
+    """
+    Set constrained_layout with better default pads.
+
+    """
+    if fig is None:
+        fig = plt.gcf()
+
+    for k, v in dict(w_pad=.01, h_pad=.01, wspace=.02, hspace=.02).items():
+        kwargs.setdefault(k, v)
+
+    fig.set_constrained_layout(kwargs)
+
+
 def auto_ticks(ax, axis='both', minor=False, **kwargs):
     """
     Convenient interface to matplotlib.ticker locators.
@@ -169,6 +133,20 @@ def auto_ticks(ax, axis='both', minor=False, **kwargs):
             axis.set_minor_locator(ticker.AutoMinorLocator(minor))
 
 
+def ratio_guides(ax, color='.93'):
+    """
+    Draw a reference line at unity and a 10% band on a ratio axis.  The guides
+    span the current x limits, so set them first.
+
+    """
+    x0, x1 = ax.get_xlim()
+    ax.plot([x0, x1], [1, 1], lw=.5, color='.5', zorder=-100)
+    ax.add_patch(patches.Rectangle(
+        xy=(x0, .9), width=(x1 - x0), height=.2,
+        color=color, lw=0, zorder=-200
+    ))
+
+
 def format_system(system):
     """
     Format a system string into a display name, e.g.:
@@ -191,15 +169,18 @@ def format_system(system):
     return '{} {} {}eV'.format('+'.join(proj), energy, prefix)
 
 
+@functools.lru_cache(maxsize=None)
 def darken(rgb, amount=.5):
     """
     Darken a color by the given amount in HSLuv space.
+    `rgb` must be hashable, e.g. a tuple.
 
     """
     h, s, l = hsluv.rgb_to_hsluv(rgb)
-    return hsluv.hsluv_to_rgb((h, s, (1 - amount)*l))
+    return tuple(hsluv.hsluv_to_rgb((h, s, (1 - amount)*l)))
 
 
+@functools.lru_cache(maxsize=None)
 def obs_color_hsluv(obs, subobs):
     """
     Return a nice color for the given observable in HSLuv space.
@@ -230,15 +211,63 @@ def obs_color_hsluv(obs, subobs):
     raise ValueError('unknown observable: {} {}'.format(obs, subobs))
 
 
+@functools.lru_cache(maxsize=None)
 def obs_color(obs, subobs):
     """
-    Return a nice color for the given observable.
+    Return a nice color for the given observable as an RGB tuple.
 
     """
-    return hsluv.hsluv_to_rgb(obs_color_hsluv(obs, subobs))
+    return tuple(hsluv.hsluv_to_rgb(obs_color_hsluv(obs, subobs)))
 
 
-def _observables_plots():
+@functools.lru_cache(maxsize=None)
+def _chain():
+    """
+    Shared MCMC chain instance.
+
+    """
+    return mcmc.Chain()
+
+
+@functools.lru_cache(maxsize=None)
+def _load_chain(keys, thin=1):
+    """
+    Read the given parameters (a tuple of keys) from the MCMC chain.  The
+    result is cached and shared between plots, so it is made read-only.
+
+    """
+    samples = _chain().load(*keys, thin=thin)
+    samples.flags.writeable = False
+    return samples
+
+
+@functools.lru_cache(maxsize=None)
+def _model_data(system, obs, subobs):
+    """
+    Model calculations at the design points for the given observable, as a
+    dict of contiguous arrays ``{'x': ..., 'Y': ...}``.  The result is cached
+    and shared between plots, so the arrays are made read-only.
+
+    """
+    dset = data_list[system][obs][subobs]
+    data = {k: np.ascontiguousarray(dset[k]) for k in ['x', 'Y']}
+
+    for array in data.values():
+        array.flags.writeable = False
+
+    return data
+
+
+@functools.lru_cache(maxsize=None)
+def get_design(system, validation=False):
+    """
+    Return the (cached) Design for the given system.
+
+    """
+    return Design(system, validation=validation)
+
+
+def _build_observables_plots():
     """
     Metadata for observables plots.
 
@@ -296,13 +325,24 @@ def _observables_plots():
     ]
 
 
+_observables_metadata = _build_observables_plots()
+
+
+def _observables_plots():
+    """
+    Return a copy of the observables plot metadata that may be modified.
+
+    """
+    return copy.deepcopy(_observables_metadata)
+
+
 def _observables(posterior=False):
     """
     Model observables at all design points or drawn from the posterior with
     experimental data points.
 
     """
-    plots = _observables_plots()
+    plots = _observables_metadata
 
     fig, axes = plt.subplots(
         nrows=len(plots), ncols=len(systems),
@@ -313,7 +353,7 @@ def _observables(posterior=False):
     )
     alpha_val = 1
     if posterior:
-        samples = mcmc.Chain().samples(100)
+        samples = _chain().samples(100)
         alpha_val = 0.3
 
     if len(systems)==1 & len(plots)==1:
@@ -326,18 +366,20 @@ def _observables(posterior=False):
             color = obs_color(obs, subobs)
             scale = opts.get('scale')
 
-            x = data_list[system][obs][subobs]['x']
-            Y = (
-                samples[system][obs][subobs]
-                if posterior else
-               data_list[system][obs][subobs]['Y']
-            )
+            mdata = _model_data(system, obs, subobs)
+            x = mdata['x']
+            Y = samples[system][obs][subobs] if posterior else mdata['Y']
 
             if scale is not None:
                 Y = Y*scale
 
-            for y in Y:
-                ax.plot(x, y, color=color, alpha=alpha_val, lw=.3)
+            # draw all curves as a single collection
+            # rasterize posterior samples to keep the PDF small
+            ax.add_collection(LineCollection(
+                np.stack(np.broadcast_arrays(x, Y), axis=-1),
+                colors=[color], alpha=alpha_val, linewidths=.3,
+                rasterized=posterior
+            ))
 
             if 'label' in opts:
                 ax.text(
@@ -354,17 +396,16 @@ def _observables(posterior=False):
 
             x = dset['x']
             y = dset['y']
-            yerr = np.sqrt(sum(
-                e**2 for e in dset['yerr'].values()
-            ))
+            # add all error sources in quadrature
+            E = np.stack(np.broadcast_arrays(*dset['yerr'].values()))
+            yerr = np.sqrt(np.einsum('i...,i...->...', E, E))
 
             if scale is not None:
                 y = y*scale
                 yerr = yerr*scale
 
-            ax.errorbar(
-                x, y, yerr=1.96*yerr, fmt='o', ms=1.7,
-                capsize=0, color='.25', zorder=1000
+            fast_errorbar(
+                ax, x, y, yerr=1.96*yerr, ms=1.7, color='.25', zorder=1000
             )
 
         if plot.get('yscale') == 'log':
@@ -401,7 +442,7 @@ def observables_design():
     """
     Model observables at design points, with experimental data plotted as reference.
     For different observables than the example, change the dictionary in
-    _observables_plot()
+    _build_observables_plots()
 
     """
     _observables(posterior=False)
@@ -412,7 +453,7 @@ def observables_posterior():
     """
     Model observables at 100 draws from the posterior, with experimental data plotted as reference.
     For different observables than the example, change the dictionary in
-    _observables_plot()
+    _build_observables_plots()
 
     """
     _observables(posterior=True)
@@ -464,20 +505,31 @@ def observables_map():
     labels = {}
     handles = dict(expt={}, model={})
 
+    system_styles = {
+        'PbPb2760': ('solid', True),
+        'PbPb5020': ('dashed', False),
+    }
+
     for plot, ax, ratio_ax in zip(plots, axes[::2].flat, axes[1::2].flat):
-        for system, (obs, subobs, opts) in itertools.product(
+        # look up data and styles before drawing
+        entries = [
+            (system, obs, subobs, opts, obs_color(obs, subobs),
+             model.map_data[system][obs][subobs], *system_styles[system])
+            for system, (obs, subobs, opts) in itertools.product(
                 systems, plot['subplots']
-        ):
-            color = obs_color(obs, subobs)
-            scale = opts.get('scale')
+            )
+        ]
 
-            linestyle, fill_markers = {
-                'PbPb2760': ('solid', True),
-                'PbPb5020': ('dashed', False),
-            }[system]
+        bands = []
 
-            x = model.map_data[system][obs][subobs]['x']
-            y = model.map_data[system][obs][subobs]['Y']
+        for (
+                system, obs, subobs, opts, color, dset,
+                linestyle, fill_markers
+        ) in entries:
+            scale = opts.get('scale')
+
+            x = dset['x']
+            y = dset['Y']
 
             if scale is not None:
                 y = y*scale
@@ -519,13 +571,12 @@ def observables_map():
                 zorder=1000
             )
 
-            ax.fill_between(
-                x, yexp - yerrsys, yexp + yerrsys,
-                facecolor='.9', zorder=-10,
-            )
+            bands.append((x, yexp - yerrsys, yexp + yerrsys))
 
             ratio_ax.plot(x, y/yexp, color=color, ls=linestyle)
 
+        fill_bands(ax, bands, facecolor='.9', zorder=-10)
+
         if plot.get('yscale') == 'log':
             ax.set_yscale('log')
             ax.minorticks_off()
@@ -557,8 +608,7 @@ def observables_map():
             size=plt.rcParams['axes.labelsize']
         )
 
-        ratio_ax.axhline(1, lw=.5, color='0.5', zorder=-100)
-        ratio_ax.axhspan(.9, 1.1, color='0.93', zorder=-200)
+        ratio_guides(ratio_ax)
         ratio_ax.set_ylim(.85, 1.15)
         ratio_ax.set_ylabel('Ratio')
         ratio_ax.text(
@@ -580,7 +630,7 @@ def find_map():
     """
     from scipy.optimize import minimize
 
-    chain = mcmc.Chain()
+    chain = _chain()
 
     fixed_params = {
         'trento_p': 0.,
@@ -595,9 +645,21 @@ def find_map():
         x = dict(zip(opt_params, x), **fixed_params)
         return [x[k] for k in chain.keys]
 
+    # the optimizer may evaluate the same point more than once (e.g. during
+    # line searches), so cache the objective to avoid emulator calls
+    cache = {}
+
+    def neg_log_posterior(x):
+        key = x.tobytes()
+        try:
+            return cache[key]
+        except KeyError:
+            cache[key] = value = -chain.log_posterior(full_x(x))[0]
+            return value
+
     res = minimize(
-        lambda x: -chain.log_posterior(full_x(x))[0],
-        x0=np.median(chain.load(*opt_params, thin=1000), axis=0),
+        neg_log_posterior,
+        x0=np.median(_load_chain(tuple(opt_params), thin=1000), axis=0),
         tol=1e-8,
         bounds=[
             (a + 1e-6*(b - a), b - 1e-6*(b - a))
@@ -617,7 +679,7 @@ def find_map():
 
     pred = chain._predict(np.atleast_2d(full_x(res.x)))
 
-    plots = _observables_plots()
+    plots = _observables_metadata
 
     fig, axes = plt.subplots(
         nrows=2*len(plots), ncols=len(systems),
@@ -632,11 +694,14 @@ def find_map():
     for (plot, system), ax, ratio_ax in zip(
             itertools.product(plots, systems), axes[::2].flat, axes[1::2].flat
     ):
+        # systematic error bands, filled together after the loop
+        bands = []
+
         for obs, subobs, opts in plot['subplots']:
             color = obs_color(obs, subobs)
             scale = opts.get('scale')
 
-            x = data_list[system][obs][subobs]['x']
+            x = _model_data(system, obs, subobs)['x']
             y = pred[system][obs][subobs][0]
 
             if scale is not None:
@@ -674,13 +739,12 @@ def find_map():
                 capsize=0, color='.25', zorder=1000
             )
 
-            ax.fill_between(
-                x, yexp - yerrsys, yexp + yerrsys,
-                color='.9', zorder=-10
-            )
+            bands.append((x, yexp - yerrsys, yexp + yerrsys))
 
             ratio_ax.plot(x, y/yexp, color=color)
 
+        fill_bands(ax, bands, color='.9', zorder=-10)
+
         if plot.get('yscale') == 'log':
             ax.set_yscale('log')
             ax.minorticks_off()
@@ -710,8 +774,7 @@ def find_map():
                 size=plt.rcParams['axes.labelsize'], rotation=-90
             )
 
-        ratio_ax.axhline(1, lw=.5, color='0.5', zorder=-100)
-        ratio_ax.axhspan(0.9, 1.1, color='0.95', zorder=-200)
+        ratio_guides(ratio_ax, color='.95')
         ratio_ax.set_ylim(0.8, 1.2)
         ratio_ax.set_yticks(np.arange(80, 121, 20)/100)
         ratio_ax.set_ylabel('Ratio')
@@ -748,6 +811,19 @@ def format_ci(samples, ci=.9):
     ])
 
 
+def _smooth_hist(samples, range=None, bins=50):
+    """
+    Histogram an array of samples and smooth it with monotonic cubic
+    interpolation.  Return arrays (x, y) with y normalized to a maximum of 1.
+
+    """
+    counts, edges = np.histogram(samples, bins=bins, range=range)
+    x = (edges[1:] + edges[:-1]) / 2
+    interp = PchipInterpolator(x, counts / counts.max())
+    x = np.linspace(x[0], x[-1], 10*x.size)
+    return x, interp(x)
+
+
 def _posterior(
         params=None, ignore=None,
         scale=1, padr=.99, padt=.98,
@@ -757,7 +833,7 @@ def _posterior(
     Triangle plot of posterior marginal and joint distributions.
 
     """
-    chain = mcmc.Chain()
+    chain = _chain()
 
     if params is None and ignore is None:
         params = set(chain.keys)
@@ -772,7 +848,7 @@ def _posterior(
     )))
     ndim = len(params)
 
-    data = chain.load(*keys).T
+    data = _load_chain(tuple(keys)).T
 
     cmap = plt.get_cmap(cmap)
     cmap.set_bad('white')
@@ -780,20 +856,16 @@ def _posterior(
     line_color = cmap(.8)
     fill_color = cmap(.5, alpha=.1)
 
+    # always return a 2D array of axes, even for a single parameter
     fig, axes = plt.subplots(
         nrows=ndim, ncols=ndim,
-        sharex='col', sharey='row',
+        sharex='col', sharey='row', squeeze=False,
         figsize=2*(scale*fullheight,)
     )
 
     for samples, key, lim, ax in zip(data, keys, ranges, axes.diagonal()):
-        counts, edges = np.histogram(samples, bins=50, range=lim)
-        x = (edges[1:] + edges[:-1]) / 2
-        y = .85 * (lim[1] - lim[0]) * counts / counts.max() + lim[0]
-        # smooth histogram with monotonic cubic interpolation
-        interp = PchipInterpolator(x, y)
-        x = np.linspace(x[0], x[-1], 10*x.size)
-        y = interp(x)
+        x, y = _smooth_hist(samples, range=lim)
+        y = .85 * (lim[1] - lim[0]) * y + lim[0]
         ax.plot(x, y, lw=.5, color=line_color)
         ax.fill_between(x, lim[0], y, color=fill_color, zorder=-10)
 
@@ -809,10 +881,16 @@ def _posterior(
         )
 
     for ny, nx in zip(*np.tril_indices_from(axes, k=-1)):
-        axes[ny][nx].hist2d(
+        # draw 2D histogram as an image, leaving empty bins blank
+        H, xedges, yedges = np.histogram2d(
             data[nx], data[ny], bins=100,
-            range=(ranges[nx], ranges[ny]),
-            cmap=cmap, cmin=1
+            range=(ranges[nx], ranges[ny])
+        )
+        H[H < 1] = np.nan
+        axes[ny][nx].imshow(
+            H.T, origin='lower', aspect='auto',
+            extent=(xedges[0], xedges[-1], yedges[0], yedges[-1]),
+            cmap=cmap, interpolation='nearest'
         )
         axes[nx][ny].set_axis_off()
 
@@ -878,14 +956,9 @@ def posterior_p():
     plt.figure(figsize=(.65*textwidth, .25*textwidth))
     ax = plt.axes()
 
-    data = mcmc.Chain().load('trento_p').ravel()
+    data = _load_chain(('trento_p',)).ravel()
 
-    counts, edges = np.histogram(data, bins=50)
-    x = (edges[1:] + edges[:-1]) / 2
-    y = counts / counts.max()
-    interp = PchipInterpolator(x, y)
-    x = np.linspace(x[0], x[-1], 10*x.size)
-    y = interp(x)
+    x, y = _smooth_hist(data)
     ax.plot(x, y, color=plt.cm.Blues(0.8))
     ax.fill_between(x, y, color=plt.cm.Blues(0.15), zorder=-10)
 
@@ -938,6 +1011,24 @@ region_style = dict(color='.93', zorder=-100)
 Tc = .154
 
 
+def etas(T, m=0, s=0, c=0):
+    """
+    Temperature dependence of shear viscosity eta/s.  Arguments broadcast,
+    e.g. a column of temperatures and rows of MCMC samples.
+
+    """
+    return m + s*(T - Tc)*(T/Tc)**c
+
+
+def zetas(T, zetas_max=0, zetas_width=1):
+    """
+    Temperature dependence of bulk viscosity zeta/s.  Arguments broadcast like
+    etas().
+
+    """
+    return zetas_max / (1 + ((T - Tc)/zetas_width)**2)
+
+
 def _region_shear(mode='full', scale=.6):
     """
     Estimate of the temperature dependence of shear viscosity eta/s.
@@ -946,10 +1037,7 @@ def _region_shear(mode='full', scale=.6):
     plt.figure(figsize=(scale*textwidth, scale*aspect*textwidth))
     ax = plt.axes()
 
-    def etas(T, m=0, s=0, c=0):
-        return m + s*(T - Tc)*(T/Tc)**c
-
-    chain = mcmc.Chain()
+    chain = _chain()
 
     rangedict = dict(zip(chain.keys, chain.range))
     ekeys = ['etas_' + k for k in ['min', 'slope', 'curv']]
@@ -982,11 +1070,13 @@ def _region_shear(mode='full', scale=.6):
             ax.plot(T, etas(T, *args), color=plt.cm.Blues(.7))
         return
 
-    eparams = chain.load(*ekeys).T
-    intervals = np.array([
-        mcmc.credible_interval(etas(t, *eparams))
-        for t in T
-    ]).T
+    eparams = _load_chain(tuple(ekeys)).T
+    # evaluate on (temperature, sample) grids a few temperatures at a time,
+    # which keeps memory bounded for long chains
+    intervals = np.concatenate([
+        mcmc.credible_interval(etas(t[:, np.newaxis], *eparams))
+        for t in np.array_split(T, np.ceil(T.size/10))
+    ], axis=1)
 
     band = ax.fill_between(T, *intervals, color=plt.cm.Blues(.32))
 
@@ -994,7 +1084,7 @@ def _region_shear(mode='full', scale=.6):
     ax.text(.299, .07, r'KSS bound $1/4\pi$', va='top', ha='right', color='.4')
 
     median, = ax.plot(
-        T, etas(T, *map(np.median, eparams)),
+        T, etas(T, *np.median(eparams, axis=1)),
         color=plt.cm.Blues(.77)
     )
 
@@ -1025,13 +1115,12 @@ def _region_bulk(mode='full', scale=.6):
     Estimate of the temperature dependence of bulk viscosity zeta/s.
 
     """
+    from sklearn.mixture import GaussianMixture
+
     plt.figure(figsize=(scale*textwidth, scale*aspect*textwidth))
     ax = plt.axes()
 
-    def zetas(T, zetas_max=0, zetas_width=1):
-        return zetas_max / (1 + ((T - Tc)/zetas_width)**2)
-
-    chain = mcmc.Chain()
+    chain = _chain()
 
     keys, ranges = map(list, zip(*(
         i for i in zip(chain.keys, chain.range)
@@ -1067,7 +1156,7 @@ def _region_bulk(mode='full', scale=.6):
         return
 
     # use a Gaussian mixture model to classify zeta/s parameters
-    samples = chain.load(*keys, thin=10)
+    samples = _load_chain(tuple(keys), thin=10)
     gmm = GaussianMixture(n_components=3, covariance_type='full').fit(samples)
     labels = gmm.predict(samples)
 
@@ -1123,6 +1212,13 @@ def flow_corr():
     cmapx_pred = .5
     dashes_pred = [3, 2]
 
+    cmaps = {(4, 2): plt.cm.Blues, (3, 2): plt.cm.Oranges}
+    # evaluate colormaps once for normal and prediction curves
+    colors = {
+        (mn, pred): cmap(cmapx_pred if pred else cmapx_normal)
+        for mn, cmap in cmaps.items() for pred in [False, True]
+    }
+
     def label(*mn, normed=False):
         fmt = r'\mathrm{{SC}}({0}, {1})'
         if normed:
@@ -1133,13 +1229,9 @@ def flow_corr():
             ['sc_central', 'sc', 'sc_normed_central', 'sc_normed'],
             axes.flat
     ):
-        for (mn, cmap), sys in itertools.product(
-                [
-                    ((4, 2), 'Blues'),
-                    ((3, 2), 'Oranges'),
-                ],
-                systems
-        ):
+        bands = []
+
+        for mn, sys in itertools.product([(4, 2), (3, 2)], systems):
             x = model.map_data[sys][obs][mn]['x']
             y = model.map_data[sys][obs][mn]['Y']
 
@@ -1164,11 +1256,7 @@ def flow_corr():
             elif ax.is_last_col() and not pred:
                 kwargs.update(label=label(*mn, normed='normed' in obs))
 
-            ax.plot(
-                x, y, lw=.75,
-                color=getattr(plt.cm, cmap)(cmapx),
-                **kwargs
-            )
+            ax.plot(x, y, lw=.75, color=colors[mn, pred], **kwargs)
 
             if pred:
                 continue
@@ -1182,10 +1270,9 @@ def flow_corr():
                 fmt='o', ms=2, capsize=0, color='.25', zorder=100
             )
 
-            ax.fill_between(
-                x, y - yerr['sys'], y + yerr['sys'],
-                color='.9', zorder=-10
-            )
+            bands.append((x, y - yerr['sys'], y + yerr['sys']))
+
+        fill_bands(ax, bands, color='.9', zorder=-10)
 
         ax.axhline(
             0, color='.75', lw=plt.rcParams['xtick.major.width'],
@@ -1228,8 +1315,11 @@ def flow_extra():
     )
 
     cmaps = {2: plt.cm.GnBu, 3: plt.cm.Purples}
+    label_colors = {subobs: cmap(.99) for subobs, cmap in cmaps.items()}
 
     for (obs, title, ylabel), ax in zip(plots, axes):
+        bands = []
+
         for sys, (cmapx, dashes, fmt) in zip(
                 systems, [
                     (.7, (None, None), 'o'),
@@ -1237,13 +1327,15 @@ def flow_extra():
                 ]
         ):
             syslabel = '{:.2f} TeV'.format(parse_system(sys)[1]/1000)
+            colors = {subobs: cmap(cmapx) for subobs, cmap in cmaps.items()}
+
             for subobs, dset in model.map_data[sys][obs].items():
                 x = dset['x']
                 y = dset['Y']
 
                 ax.plot(
                     x, y,
-                    color=cmaps[subobs](cmapx), dashes=dashes,
+                    color=colors[subobs], dashes=dashes,
                     label='Model ' + syslabel
                 )
 
@@ -1256,23 +1348,22 @@ def flow_extra():
                 y = dset['y']
                 yerr = dset['yerr']
 
-                ax.errorbar(
-                    x, y, yerr=yerr['stat'],
-                    fmt=fmt, ms=2.2, capsize=0, color='.25', zorder=100,
+                fast_errorbar(
+                    ax, x, y, yerr=yerr['stat'],
+                    fmt=fmt, ms=2.2, color='.25', zorder=100,
                     label='ALICE ' + syslabel
                 )
 
-                ax.fill_between(
-                    x, y - yerr['sys'], y + yerr['sys'],
-                    color='.9', zorder=-10
-                )
+                bands.append((x, y - yerr['sys'], y + yerr['sys']))
 
                 if obs == 'vnk_central':
                     ax.text(
                         x[-1] + .15, y[-1], '$v_{}$'.format(subobs),
-                        color=cmaps[subobs](.99), ha='left', va='center'
+                        color=label_colors[subobs], ha='left', va='center'
                     )
 
+        fill_bands(ax, bands, color='.9', zorder=-10)
+
         auto_ticks(ax, 'y', minor=2)
         ax.set_xlim(0, dset['cent'][-1][1])
 
@@ -1293,13 +1384,13 @@ def design():
     """
     fig = plt.figure(figsize=(.5*textwidth, .5*textwidth))
     ratio = 5
-    gs = plt.GridSpec(ratio + 1, ratio + 1)
+    gs = plt.GridSpec(ratio + 1, ratio + 1, figure=fig)
 
     ax_j = fig.add_subplot(gs[1:, :-1])
     ax_x = fig.add_subplot(gs[0, :-1], sharex=ax_j)
     ax_y = fig.add_subplot(gs[1:, -1], sharey=ax_j)
 
-    d = Design(systems[0])
+    d = get_design(systems[0])
 
     #############
     ###Change this to own keys
@@ -1343,6 +1434,9 @@ def gp():
     Simple example plots with dummy data.
 
     """
+    from sklearn.gaussian_process import GaussianProcessRegressor as GPR
+    from sklearn.gaussian_process import kernels
+
     fig, axes = plt.subplots(
         figsize=(.45*textwidth, .85*textheight),
         nrows=2, sharex='col'
@@ -1358,7 +1452,8 @@ def gp():
             warnings.simplefilter('ignore', RuntimeWarning)
             return gp.sample_y(*args, **kwargs)
 
-    x = np.linspace(0, 5, 1000)
+    # enough points for smooth curves at the final figure size
+    x = np.linspace(0, 5, 300)
     X = x[:, np.newaxis]
 
     x_train = np.linspace(.5, 4.5, 4)
@@ -1401,14 +1496,14 @@ def gp():
 def pca():
     fig = plt.figure(figsize=(.45*textwidth, .45*textwidth))
     ratio = 5
-    gs = plt.GridSpec(ratio + 1, ratio + 1)
+    gs = plt.GridSpec(ratio + 1, ratio + 1, figure=fig)
 
     ax_j = fig.add_subplot(gs[1:, :-1])
     ax_x = fig.add_subplot(gs[0, :-1], sharex=ax_j)
     ax_y = fig.add_subplot(gs[1:, -1], sharey=ax_j)
 
     x, y = (
-        data_list[systems[0]][obs][subobs]['Y'][:, 3]
+        _model_data(systems[0], obs, subobs)['Y'][:, 3]
         for obs, subobs in [('R_AA', None), ('R_AA', None)]
     )
     xlabel = r'$dN_{\pi^\pm}/dy$'
@@ -1431,16 +1526,19 @@ def pca():
     xystd = xy.std(axis=0)
     xy -= xymean
     xy /= xystd
-    pca = PCA().fit(xy)
-    pc = (
-        7 * xystd *
-        pca.explained_variance_ratio_[:, np.newaxis] *
-        pca.components_
-    )
-
-    for w, p in zip(pca.explained_variance_ratio_, pc):
-        if np.all(p < 0):
-            p *= -1
+    # principal components from the eigendecomposition of the 2x2 covariance,
+    # in order of decreasing variance
+    var, vecs = np.linalg.eigh(np.cov(xy, rowvar=False))
+    order = var.argsort()[::-1]
+    evr = var[order] / var.sum()
+    components = vecs[:, order].T
+    # eigenvector signs are arbitrary; flip each component to point up (or
+    # right, if it is horizontal) so the arrows do not depend on rounding
+    dx, dy = components.T
+    components[(dy < 0) | ((dy == 0) & (dx < 0))] *= -1
+    pc = 7 * xystd * evr[:, np.newaxis] * components
+
+    for w, p in zip(evr, pc):
         ax_j.annotate(
             '', xymean + p, xymean, zorder=20,
             arrowprops=dict(
@@ -1486,6 +1584,11 @@ def trento_events():
     Random trento events.
 
     """
+    import subprocess
+    import tempfile
+
+    import h5py
+
     fig, axes = plt.subplots(
         nrows=3, sharex='col',
         figsize=(.28*textwidth, .85*textheight)
@@ -1503,7 +1606,10 @@ def trento_events():
 
         with h5py.File(t.name, 'r') as f:
             for dset, ax in zip(f.values(), axes):
-                ax.pcolorfast(xyr, xyr, np.array(dset), cmap=plt.cm.Blues)
+                ax.imshow(
+                    np.asarray(dset), origin='lower', extent=2*xyr,
+                    cmap=plt.cm.Blues, interpolation='nearest'
+                )
                 ax.set_aspect('equal')
                 for xy in ['x', 'y']:
                     getattr(ax, 'set_{}ticks'.format(xy))([-5, 0, 5])
@@ -1514,10 +1620,178 @@ def trento_events():
     set_tight(fig, h_pad=.5)
 
 
-def boxplot(
-        ax, percentiles, x=0, y=0, box_width=1, line_width=1,
-        color=(0, 0, 0), alpha=.6, zorder=10
+def fast_errorbar(
+        ax, x, y, xerr=None, yerr=None, fmt='o', ms=None, lw=None,
+        color=offblack, alpha=None, zorder=2, rasterized=False, **kwargs
+):
+    """
+    Lightweight replacement for ax.errorbar() without caps.  Draws all error
+    bars as a single LineCollection and all markers as a single scatter plot.
+    Extra `kwargs` are passed to ax.scatter().  Like ax.errorbar(), returns
+    an ErrorbarContainer, which carries the `label` so that legends show the
+    marker together with an error bar.  If `rasterized`, both bars and
+    markers are rasterized in vector output.
+
+    """
+    if ms is None:
+        ms = plt.rcParams['lines.markersize']
+    if lw is None:
+        lw = plt.rcParams['lines.linewidth']
+
+    x = np.asarray(x)
+    y = np.asarray(y)
+
+    # line segments of shape (npoints, 2, 2)
+    segments = []
+    if yerr is not None:
+        segments.append(np.stack([
+            np.column_stack([x, y - yerr]),
+            np.column_stack([x, y + yerr])
+        ], axis=1))
+    if xerr is not None:
+        segments.append(np.stack([
+            np.column_stack([x - xerr, y]),
+            np.column_stack([x + xerr, y])
+        ], axis=1))
+
+    barcols = []
+    if segments:
+        barcols.append(ax.add_collection(LineCollection(
+            np.concatenate(segments),
+            colors=[color], linewidths=lw, alpha=alpha, zorder=zorder,
+            rasterized=rasterized
+        )))
+
+    label = kwargs.pop('label', None)
+    kwargs.setdefault('linewidths', 0)
+
+    ax.scatter(
+        x, y, s=ms**2, marker=fmt,
+        color=color, alpha=alpha, zorder=zorder, rasterized=rasterized,
+        **kwargs
+    )
+
+    # the scatter plot cannot be drawn by the errorbar legend handler, so
+    # represent the markers by an equivalent line that is not drawn
+    marker_line = lines.Line2D(
+        [], [], ls='none', marker=fmt, ms=ms,
+        color=color, mew=0, alpha=alpha
+    )
+
+    container = ErrorbarContainer(
+        (marker_line, (), tuple(barcols)),
+        has_xerr=(xerr is not None), has_yerr=(yerr is not None),
+        label=label
+    )
+    ax.add_container(container)
+
+    return container
+
+
+def fill_bands(ax, bands, **kwargs):
+    """
+    Fill several bands between curves as a single PolyCollection, like
+    calling ax.fill_between() for each.  `bands` is a sequence of ``(x, lo,
+    hi)`` triples.  `kwargs` are passed to PolyCollection.  Returns the
+    collection, or None if there are no bands.
+
+    """
+    if not bands:
+        return None
+
+    verts = [
+        np.concatenate([
+            np.column_stack([x, lo]),
+            np.column_stack([x[::-1], hi[::-1]])
+        ])
+        for x, lo, hi in bands
+    ]
+
+    collection = PolyCollection(verts, **kwargs)
+    ax.add_collection(collection)
+    ax.autoscale_view()
+
+    return collection
+
+
+def _boxplot_geom(percentiles, x, box_width):
+    """
+    Compute boxplot geometry for boxplot_batch():  box vertices with shape
+    ``(nboxes, 4, 2)``, median segments ``(nboxes, 2, 2)``, and whisker
+    segments ``(2*nboxes, 2, 2)``.
+
+    """
+    pl, q1, q2, q3, ph = np.asarray(percentiles, dtype=float)
+
+    left = x - .5*box_width
+    right = x + .5*box_width
+
+    boxes = np.stack([
+        np.column_stack([left, q1]),
+        np.column_stack([right, q1]),
+        np.column_stack([right, q3]),
+        np.column_stack([left, q3]),
+    ], axis=1)
+
+    def segments(x0, y0, x1, y1):
+        return np.stack([
+            np.column_stack([x0, y0]),
+            np.column_stack([x1, y1])
+        ], axis=1)
+
+    medians = segments(left, q2, right, q2)
+    whiskers = np.concatenate([segments(x, q1, x, pl), segments(x, q3, x, ph)])
+
+    return boxes, medians, whiskers
+
+
+def boxplot_batch(
+        ax, percentiles, x, box_width=1, line_width=1,
+        color=(0, 0, 0), alpha=.6, zorder=10, rasterized=False
 ):
+    """
+    Draw several minimal boxplots at once, using one collection each for the
+    boxes, median lines, and whiskers.
+
+    `percentiles` must be a np.array with shape ``(5, nboxes)``, the rows being
+
+        whisker_low, quartile_1, median, quartile_3, whisker_high
+
+    `x` are the box positions.  `color` may be a single color or a list of
+    colors for each box.  If `rasterized`, the boxplots are rasterized in
+    vector output.
+
+    """
+    x = np.asarray(x, dtype=float)
+    colors = np.broadcast_to(mcolors.to_rgba_array(color), (x.size, 4))
+
+    boxes, medians, whiskers = _boxplot_geom(percentiles, x, box_width)
+
+    # IQR boxes
+    ax.add_collection(PolyCollection(
+        boxes, facecolors=colors, edgecolors='none', linewidths=0,
+        alpha=alpha, zorder=zorder, rasterized=rasterized
+    ))
+
+    # median lines
+    ax.add_collection(LineCollection(
+        medians,
+        colors=colors, linewidths=line_width, capstyle='butt',
+        zorder=zorder + 1, rasterized=rasterized
+    ))
+
+    # whisker lines
+    ax.add_collection(LineCollection(
+        whiskers,
+        colors=np.concatenate([colors, colors]),
+        linewidths=line_width, capstyle='butt', alpha=alpha, zorder=zorder,
+        rasterized=rasterized
+    ))
+
+    ax.autoscale_view()
+
+
+def boxplot(ax, percentiles, x=0, y=0, **kwargs):
     """
     Draw a minimal boxplot.
 
@@ -1525,29 +1799,53 @@ def boxplot(
 
         whisker_low, quartile_1, median, quartile_3, whisker_high
 
+    Other arguments are passed to boxplot_batch().
+
     """
-    pl, q1, q2, q3, ph = percentiles + y
+    boxplot_batch(
+        ax, (np.asarray(percentiles) + y)[:, np.newaxis], [x], **kwargs
+    )
 
-    # IQR box
-    ax.add_patch(patches.Rectangle(
-        xy=(x - .5*box_width, q1),
-        width=box_width, height=(q3 - q1),
-        color=color, alpha=alpha, lw=0, zorder=zorder
-    ))
 
-    # median line
-    ax.plot(
-        [x - .5*box_width, x + .5*box_width], 2*[q2],
-        lw=line_width, solid_capstyle='butt', color=color,
-        zorder=zorder + 1
+# standard normal quantiles at 75% and 90%, i.e. the 50% and 80% intervals
+normal_quantiles = np.sqrt(2) * special.erfinv(2*np.array([.75, .90]) - 1)
+
+
+def add_quantile_axis(ax):
+    """
+    Add a twin y-axis to `ax`, an axis of normalized residuals, labeled with
+    the corresponding quantiles of the standard normal distribution.  The
+    twin axis has no frame or background.  Set the y limits of `ax` first.
+
+    """
+    q, p = normal_quantiles
+
+    ax_q = ax.twinx()
+    ax_q.set_frame_on(False)
+    ax_q.set_ylim(ax.get_ylim())
+    ax_q.set_yticks([-p, -q, 0, q, p])
+    ax_q.set_yticklabels([10, 25, 50, 75, 90])
+    ax_q.tick_params('y', right=False)
+    ax_q.set_ylabel(
+        'Normal quantiles',
+        fontdict=dict(rotation=-90),
+        labelpad=3*plt.rcParams['axes.labelpad']
     )
 
-    # whisker lines
-    for y in [[q1, pl], [q3, ph]]:
-        ax.plot(
-            2*[x], y, lw=line_width, solid_capstyle='butt',
-            color=color, alpha=alpha, zorder=zorder
-        )
+    return ax_q
+
+
+@functools.lru_cache(maxsize=None)
+def _validation_predict(system):
+    """
+    Emulator predictions (mean, std) at the validation design points.  Cached
+    since several validation plots use the same predictions.
+
+    """
+    return emulators[system].predict(
+        get_design(system, validation=True).array,
+        return_std=True
+    )
 
 
 #@plot
@@ -1568,10 +1866,7 @@ def validation_all(system='PbPb5020'):
 
     vdata = data_list_val[system]
     emu = emulators[system]
-    mean, cov = emu.predict(
-        Design(system, validation=True).array,
-        return_cov=True
-    )
+    mean, std = _validation_predict(system)
 
     def label(obs, subobs):
         if obs.startswith('d') and obs.endswith('_deta'):
@@ -1591,59 +1886,65 @@ def validation_all(system='PbPb5020'):
         if obs == 'vnk':
             return r'$v_{}\{{{}\}}$'.format(*subobs)
 
-    for obs, subobslist in emu.observables:
-        for subobs in subobslist:
-            color = obs_color(obs, subobs)
+    obs_list = [
+        (obs, subobs)
+        for obs, subobslist in emu.observables
+        for subobs in subobslist
+    ]
 
-            Y = vdata[obs][subobs]['Y']
-            Y_ = mean[obs][subobs]
-            S_ = np.sqrt(cov[(obs, subobs), (obs, subobs)].T.diagonal())
+    # stack all observables (centrality bins) into columns
+    Y = np.concatenate(
+        [vdata[obs][subobs]['Y'] for obs, subobs in obs_list], axis=1
+    )
+    Y_ = np.concatenate([mean[obs][subobs] for obs, subobs in obs_list], axis=1)
+    S_ = np.concatenate([std[obs][subobs] for obs, subobs in obs_list], axis=1)
 
-            Z = (Y_ - Y)/S_
+    Z = (Y_ - Y)/S_
+    percentiles = np.percentile(Z, [10, 25, 50, 75, 90], axis=0)
+    rms = 100*np.sqrt(np.square(Y_/Y - 1).mean(axis=0))
 
-            for i, percentiles in enumerate(
-                    np.percentile(Z, [10, 25, 50, 75, 90], axis=0).T,
-                    start=index
-            ):
-                boxplot(ax_box, percentiles, x=i, box_width=.75, color=color)
+    # x positions, leaving a gap between observables
+    x = []
+    colors = []
 
-            rms = 100*np.sqrt(np.square(Y_/Y - 1).mean(axis=0))
-            ax_rms.plot(
-                np.arange(index, index + rms.size), rms, 'o', color=color
-            )
+    for obs, subobs in obs_list:
+        n = vdata[obs][subobs]['Y'].shape[1]
+        x.append(np.arange(index, index + n))
+        colors += n*[obs_color(obs, subobs)]
 
-            ticks.append(.5*(index + i))
-            ticklabels.append(label(obs, subobs))
+        ticks.append(index + .5*(n - 1))
+        ticklabels.append(label(obs, subobs))
 
-            index = i + 2
+        index += n + 1
 
-    ax_box.set_xticks(ticks)
-    ax_box.set_xticklabels(ticklabels)
-    ax_box.tick_params('x', bottom=False, labelsize=plt.rcParams['font.size'])
+    x = np.concatenate(x)
+
+    boxplot_batch(
+        ax_box, percentiles, x,
+        box_width=.75, color=colors, rasterized=True
+    )
+    ax_rms.scatter(
+        x, rms, s=plt.rcParams['lines.markersize']**2,
+        color=colors, linewidths=0, rasterized=True
+    )
 
-    ax_box.set_ylim(-2.5, 2.5)
-    ax_box.set_ylabel(r'Normalized residuals')
+    ax_box.set(
+        xticks=ticks, xticklabels=ticklabels,
+        ylim=(-2.5, 2.5), ylabel=r'Normalized residuals'
+    )
+    ax_box.tick_params('x', bottom=False, labelsize=plt.rcParams['font.size'])
 
-    q, p = np.sqrt(2) * special.erfinv(2*np.array([.75, .90]) - 1)
+    q, p = normal_quantiles
     ax_box.axhspan(-q, q, color='.85', zorder=-20)
     for s in [-1, 0, 1]:
         ax_box.axhline(s*p, color='.5', zorder=-10)
 
-    ax_q = ax_box.twinx()
-    ax_q.set_ylim(ax_box.get_ylim())
-    ax_q.set_yticks([-p, -q, 0, q, p])
-    ax_q.set_yticklabels([10, 25, 50, 75, 90])
-    ax_q.tick_params('y', right=False)
-    ax_q.set_ylabel(
-        'Normal quantiles',
-        fontdict=dict(rotation=-90),
-        labelpad=3*plt.rcParams['axes.labelpad']
-    )
+    add_quantile_axis(ax_box)
 
-    ax_rms.set_xticks([])
-    ax_rms.set_yticks(np.arange(0, 16, 5))
-    ax_rms.set_ylim(0, 15)
-    ax_rms.set_ylabel('RMS % error')
+    ax_rms.set(
+        xticks=[], yticks=np.arange(0, 16, 5), ylim=(0, 15),
+        ylabel='RMS % error'
+    )
 
     for y in ax_rms.get_yticks():
         ax_rms.axhline(y, color='.5', zorder=-10)
@@ -1677,28 +1978,24 @@ def validation_example(
     cent_slc = (slice(None), vdata['cent'].index(cent))
     y = vdata['Y'][cent_slc]
 
-    mean, cov = emulators[system].predict(
-        Design(system, validation=True).array,
-        return_cov=True
-    )
+    mean, std = _validation_predict(system)
     y_ = mean[obs][subobs][cent_slc]
-    std_ = np.sqrt(cov[(obs, subobs), (obs, subobs)].T.diagonal()[cent_slc])
+    std_ = std[obs][subobs][cent_slc]
     print('made it')
 
     color = obs_color(obs, subobs)
     alpha = .6
 
     ax_scatter.set_aspect('equal')
-    ax_scatter.errorbar(
-        y_, y, xerr=std_,
-        fmt='o', ms=2.5, mew=.1, mec='white',
-        color=color, alpha=alpha
+    fast_errorbar(
+        ax_scatter, y_, y, xerr=std_, ms=2.5,
+        color=color, alpha=alpha, edgecolors='white', linewidths=.1,
+        rasterized=True
     )
     dy = .03*y.ptp()
     x = [y.min() - dy, y.max() + dy]
     ax_scatter.plot(x, x, color='.4')
-    ax_scatter.set_xlabel('Emulator prediction')
-    ax_scatter.set_ylabel('Model calculation')
+    ax_scatter.set(xlabel='Emulator prediction', ylabel='Model calculation')
     ax_scatter.text(
         .04, .96, '{} {}–{}%'.format(label, *cent),
         horizontalalignment='left', verticalalignment='top',
@@ -1722,12 +2019,13 @@ def validation_example(
 
     boxplot(
         ax_hist, np.percentile(z, [10, 25, 50, 75, 90]),
-        x=box_x, box_width=box_width, color=color, alpha=alpha
+        x=box_x, box_width=box_width, color=color, alpha=alpha,
+        rasterized=True
     )
 
     guide_width = 2.5*box_width
 
-    q, p = np.sqrt(2) * special.erfinv(2*np.array([.75, .90]) - 1)
+    q, p = normal_quantiles
     ax_hist.add_patch(patches.Rectangle(
         xy=(box_x - .5*guide_width, -q),
         width=guide_width, height=2*q,
@@ -1744,17 +2042,7 @@ def validation_example(
     ax_hist.tick_params('x', bottom=False, labelbottom=False)
     ax_hist.set_ylabel('Normalized residuals')
 
-    ax_q = ax_hist.twinx()
-    ax_q.spines['bottom'].set_visible(False)
-    ax_q.set_ylim(ax_hist.get_ylim())
-    ax_q.set_yticks([-p, -q, 0, q, p])
-    ax_q.set_yticklabels([10, 25, 50, 75, 90])
-    ax_q.tick_params('y', right=False)
-    ax_q.set_ylabel(
-        'Normal quantiles',
-        fontdict=dict(rotation=-90),
-        labelpad=3*plt.rcParams['axes.labelpad']
-    )
+    add_quantile_axis(ax_hist)
 
 
 
@@ -1811,7 +2099,7 @@ def diag_emu(system=default_system):
     ymax = np.ceil(max(np.fabs(g.y_train_).max() for g in gps))
     ylim = (-ymax, ymax)
 
-    design = Design(system)
+    design = get_design(system)
 
     for ny, (gp, row) in enumerate(zip(gps, axes)):
         y = gp.y_train_
@@ -1822,13 +2110,19 @@ def diag_emu(system=default_system):
             ax.plot(x, y, 'o', ms=.8, color='.75', zorder=10)
 
             x = np.linspace(xlim[0], xlim[1], 100)
-            X = np.empty((x.size, ncols))
 
-            for k, r in enumerate([.2, .5, .8]):
-                X[:] = r*design.min + (1 - r)*design.max
-                X[:, nx] = x
-                mean, std = gp.predict(X, return_std=True)
+            # predict along x at several points in design space at once
+            r = np.array([.2, .5, .8])[:, np.newaxis, np.newaxis]
+            X = np.empty((r.size, x.size, ncols))
+            X[:] = r*design.min + (1 - r)*design.max
+            X[:, :, nx] = x
+
+            means, stds = (
+                a.reshape(r.size, x.size)
+                for a in gp.predict(X.reshape(-1, ncols), return_std=True)
+            )
 
+            for k, (mean, std) in enumerate(zip(means, stds)):
                 color = plt.cm.tab10(k)
                 ax.plot(x, mean, lw=.2, color=color, zorder=30)
                 ax.fill_between(
@@ -1836,11 +2130,61 @@ def diag_emu(system=default_system):
                     lw=0, color=color, alpha=.3, zorder=20
                 )
 
-            ax.set_xlim(xlim)
-            ax.set_ylim(ylim)
+            ax.set(
+                xlim=xlim, ylim=ylim,
+                xlabel=label, ylabel='PC {}'.format(ny)
+            )
+
+
+def _run_one(name):
+    """
+    Generate a single plot by name.  Defined at module level so it can be sent
+    to worker processes.
+
+    """
+    plt.switch_backend('Agg')
+    plot_functions[name]()
+
+
+# plots that evaluate the emulators, directly or via the MCMC chain
+emulator_plots = {
+    'observables_posterior', 'find_map', 'validation_all',
+    'validation_example', 'diag_pca', 'diag_emu',
+}
+
+
+def load_emulators():
+    """
+    Load (or train and cache) the emulator for each system that is not
+    already loaded in this process.
+
+    """
+    for system in systems:
+        if system not in emulators:
+            emulators[system] = Emulator.from_cache(system)
+
+
+def generate_all(names=None, n_jobs=None):
+    """
+    Generate several plots (default: all) in parallel using `n_jobs` worker
+    processes (default: the number of CPUs).
+
+    Each worker loads MCMC chains etc. separately, but they are cached within
+    a worker, so plots that run in the same worker share them.  If any of
+    the plots use the emulators, they are loaded in the parent first, so
+    that forked workers inherit them instead of each training their own.
+
+    """
+    from multiprocessing import Pool
+
+    if names is None:
+        names = list(plot_functions)
+
+    if emulator_plots.intersection(names):
+        load_emulators()
 
-            ax.set_xlabel(label)
-            ax.set_ylabel('PC {}'.format(ny))
+    with Pool(n_jobs) as pool:
+        pool.map(_run_one, names, chunksize=1)
 
 
 if __name__ == '__main__':
@@ -1872,5 +2216,4 @@ if __name__ == '__main__':
         for p in args.plots:
             plot_functions[p]()
     else:
-        for f in plot_functions.values():
-            f()
+        generate_all()